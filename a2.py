@@ -1,5 +1,10 @@
+import itertools
+import multiprocessing
+import sys
+import time
 import tkinter as tk
 from tkinter import messagebox, filedialog
+from multiprocessing import resource_tracker, shared_memory
 from typing import Callable, Optional
 from support import *
 
@@ -33,6 +38,11 @@ class Weapon():
         return self._effect
     
     
+    def get_range(self) -> int:
+        """Returns how many tiles the weapon reaches in each cardinal direction."""
+        return self._range
+    
+    
     def get_targets(self, position: Position) -> list[Position]:
         """Returns a list of positions in range from the given position (cardinal directions only)."""
         x, y = position
@@ -268,6 +278,8 @@ class Slug(Entity):
         self._name = 'Slug'
         self._stunned = False
         self._poisoned = False
+        self._scheduler = None
+        self._flag_turn = 0
 
     
     def choose_move(self, candidates: list['Position'], current_position: 'Position', player_position: 'Position') -> 'Position':
@@ -275,16 +287,57 @@ class Slug(Entity):
     
     def can_move(self) -> bool:
         """Returns True if the slug can move this turn, otherwise False."""
+        self._sync_move_flag()
         return self._can_move_flag
 
     def set_can_move_flag(self, can_move: bool) -> None:
         """Sets whether the slug can move."""
         self._can_move_flag = can_move
+        if self._scheduler is not None:
+            self._flag_turn = self._scheduler.get_turn()
     
     def end_turn(self) -> None:
         """Registers that the slug has completed another turn."""
+        self._sync_move_flag()
         self._can_move_flag = not self._can_move_flag
 
+    def set_scheduler(self, scheduler: Optional['_SlugScheduler']) -> None:
+        """Sets the scheduler that runs this slug's turns, or None."""
+        self._sync_move_flag()
+        self._scheduler = scheduler
+        self._flag_turn = scheduler.get_turn() if scheduler is not None else 0
+
+    def apply_effects(self, effects: dict[str, int]) -> None:
+        """Applies effects to the slug and lets its scheduler know."""
+        super().apply_effects(effects)
+        if self._scheduler is not None:
+            self._scheduler.notify_effects(self)
+
+    def equip(self, weapon: 'Weapon') -> None:
+        """Equips the slug with a weapon and lets its scheduler know."""
+        super().equip(weapon)
+        if self._scheduler is not None:
+            self._scheduler.notify_equip(self)
+
+    def _sync_move_flag(self) -> None:
+        """Brings the move flag up to date with turns the scheduler skipped.
+
+        A turn always leaves the flag as (poisoned or stunned), and the
+        scheduler only skips slugs that are not poisoned, so every skipped
+        turn leaves it as is_stunned().
+        """
+        if self._scheduler is not None and self._flag_turn != self._scheduler.get_turn():
+            self._can_move_flag = self.is_stunned()
+            self._flag_turn = self._scheduler.get_turn()
+
+    def __getstate__(self) -> dict:
+        """Returns the slug's state for pickling, without its scheduler."""
+        self._sync_move_flag()
+        state = self.__dict__.copy()
+        state["_scheduler"] = None
+        state["_flag_turn"] = 0
+        return state
+
     def is_poisoned(self) -> bool:
         """Returns True if the slug is poisoned (i.e., poison value > 0)."""
         return self._poison > 0
@@ -357,7 +410,7 @@ class ScaredSlug(Slug):
     
     def can_move(self) -> bool:
         """Returns True if the slug can move this turn, otherwise False."""
-        return self._can_move_flag
+        return super().can_move()
     
     def distance(self, pos1, pos2):
     # Correct version to compute the Euclidean distance
@@ -377,13 +430,172 @@ class ScaredSlug(Slug):
     def __repr__(self) -> str:
         return "ScaredSlug()"
     
+class _SlugDict(dict):
+    """A slug dictionary that tells its scheduler about every slug added."""
+
+    def __init__(self, scheduler: '_SlugScheduler') -> None:
+        super().__init__()
+        self._scheduler = scheduler
+
+    def __setitem__(self, position: Position, slug: Slug) -> None:
+        is_new = position not in self
+        super().__setitem__(position, slug)
+        self._scheduler.attach(position, slug, is_new)
+
+    def setdefault(self, position: Position, slug: Slug = None) -> Slug:
+        if position not in self:
+            self[position] = slug
+        return self[position]
+
+    def update(self, *args, **kwargs) -> None:
+        for position, slug in dict(*args, **kwargs).items():
+            self[position] = slug
+
+    def __ior__(self, other) -> '_SlugDict':
+        self.update(other)
+        return self
+
+
+class _SlugScheduler():
+    """Schedules the end-of-turn work for the slugs of one game.
+
+    Poison and death only need work for slugs that are poisoned or have just
+    been hurt, so only those wait in the queue; a slug leaves it when its
+    poison runs out or it dies. Every other slug is skipped. A turn always
+    leaves a slug's move flag as (poisoned or stunned), so skipped slugs
+    work their flag out from the turn number when asked. Only slugs that
+    can reach the player attack, and those are found by looking along the
+    player's row and column as far as the longest slug weapon reaches.
+    """
+
+    def __init__(self, slugs: dict[Position, Slug]) -> None:
+        """Constructs a scheduler for the given slugs (which are copied)."""
+        self._turn = 0
+        self._reach = 0
+        self._next_order = 0
+        self._order = {}
+        self._positions = {}
+        self._queue = {}
+        self._slugs = _SlugDict(self)
+        for position, slug in slugs.items():
+            self._slugs[position] = slug
+
+    def get_slugs(self) -> dict[Position, Slug]:
+        """Returns the live slug dictionary."""
+        return self._slugs
+
+    def get_turn(self) -> int:
+        """Returns the number of turns run so far."""
+        return self._turn
+
+    def attach(self, position: Position, slug: Slug, is_new: bool) -> None:
+        """Registers a slug placed at the given position."""
+        if is_new:
+            # Attacks on the player happen in dictionary order
+            self._order[position] = self._next_order
+            self._next_order += 1
+        slug.set_scheduler(self)
+        self._positions[slug] = position
+        self.notify_equip(slug)
+        self.notify_effects(slug)
+
+    def notify_effects(self, slug: Slug) -> None:
+        """Queues the slug if it now needs end-of-turn work."""
+        if slug.is_poisoned() or not slug.is_alive():
+            self._queue[slug] = None
+
+    def notify_equip(self, slug: Slug) -> None:
+        """Extends the attack search if the slug's weapon reaches further."""
+        weapon = slug.get_weapon()
+        if weapon is not None:
+            self._reach = max(self._reach, weapon.get_range())
+
+    def run_turn(self, player_position: Position) -> tuple[list, list]:
+        """Runs the poison, death and attack phases of a turn.
+
+        Dead slugs are removed from the slug dictionary.
+
+        Returns:
+            (dead_slugs, attacks) where dead_slugs lists (position, slug) for
+            each slug that died and attacks lists (position, effect) for each
+            slug that attacked the player, in dictionary order.
+        """
+        self._turn += 1
+        slugs = self._slugs
+
+        dead_slugs = []
+        for slug in list(self._queue):
+            position = self._positions.get(slug)
+            if position is None or slugs.get(position) is not slug:
+                # The slug has been taken out of the game
+                del self._queue[slug]
+                continue
+
+            slug.apply_poison()
+            if not slug.is_alive():
+                dead_slugs.append((position, slug))
+                del self._queue[slug]
+                del self._positions[slug]
+                continue
+            if not slug.is_poisoned():
+                del self._queue[slug]
+            slug.set_can_move_flag(slug.is_poisoned() or slug.is_stunned())
+
+        for position, _ in dead_slugs:
+            del slugs[position]
+
+        # Slugs that can move attack if the player is within their weapon's targets
+        attacks = []
+        x, y = player_position
+        for distance in range(1, self._reach + 1):
+            for position in ((x - distance, y), (x + distance, y), (x, y - distance), (x, y + distance)):
+                slug = slugs.get(position)
+                if (slug is not None and not (slug.is_poisoned() or slug.is_stunned()) and
+                        player_position in slug.get_weapon_targets(position)):
+                    attacks.append((self._order[position], position, slug.get_weapon_effect()))
+        attacks.sort(key=lambda attack: attack[0])
+
+        return dead_slugs, [(position, effects) for _, position, effects in attacks]
+
+
+# Bit of the neighbour mask for each single-step move (up, down, left, right)
+_MOVE_BITS = {(-1, 0): 0, (1, 0): 1, (0, -1): 2, (0, 1): 3}
+
+
 class SlugDungeonModel():
     def __init__(self, tiles: list[list[Tile]], slugs: dict[Position, Slug], player: Player, player_position: Position) -> None:
         self._tiles = tiles
-        self._slugs = slugs
+        self._slug_scheduler = _SlugScheduler(slugs)
+        self._slugs = self._slug_scheduler.get_slugs()
         self._player = player
         self._player_position = player_position
         self._previous_player_position = player_position
+        self._columns = len(tiles[0])
+        self._neighbour_masks = None
+
+    def _get_neighbour_masks(self) -> bytearray:
+        """Returns the walkable-neighbour mask of every cell, building it on first use.
+
+        Walls never change during a game, so the masks are built lazily, at
+        most once per level, by the first move or slug move check rather than
+        when the level is loaded. Cell row * #columns + column holds one bit
+        per walkable neighbour: 1 up, 2 down, 4 left and 8 right.
+        """
+        if self._neighbour_masks is None:
+            rows, columns = self.get_dimensions()
+            masks = bytearray(rows * columns)
+            walkable_rows = [[not tile.is_blocking_tile() for tile in row] for row in self._tiles]
+            for x, walkable in enumerate(walkable_rows):
+                above = walkable_rows[x - 1] if x > 0 else None
+                below = walkable_rows[x + 1] if x < rows - 1 else None
+                base = x * columns
+                for y in range(columns):
+                    masks[base + y] = ((above is not None and above[y])
+                                       | (below is not None and below[y]) << 1
+                                       | (y > 0 and walkable[y - 1]) << 2
+                                       | (y < columns - 1 and walkable[y + 1]) << 3)
+            self._neighbour_masks = masks
+        return self._neighbour_masks
 
     def get_tiles(self) -> list[list[Tile]]:
         """Returns the tiles for this game in the same format provided to __init__."""
@@ -421,15 +633,11 @@ class SlugDungeonModel():
         
         valid_positions = []
         x, y = current_position
-        
-        # Possible moves (up, down, left, right)
-        possible_moves = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
-
-        for move in possible_moves:
-            # Check if the move is within the bounds of the board
-            if (0 <= move[0] < len(self._tiles) and
-                0 <= move[1] < len(self._tiles[0]) and
-                not self.get_tile(move).is_blocking_tile() and
+        mask = self._get_neighbour_masks()[x * len(self._tiles[0]) + y]
+
+        # Walkable neighbours (up, down, left, right) only change with the walls
+        for bit, move in enumerate([(x-1, y), (x+1, y), (x, y-1), (x, y+1)]):
+            if (mask >> bit & 1 and
                 move not in self._slugs and  # No other slug is at the new position
                 move != self._player_position):  # No player is at the new position
                 valid_positions.append(move)
@@ -458,60 +666,109 @@ class SlugDungeonModel():
         # Apply poison to player
         self._player.apply_poison()
         
-        # Apply poison and remove dead slugs
-        dead_slugs = []
-        for pos, slug in self._slugs.items():
-            slug.apply_poison()
-            if not slug.is_alive():
-                dead_slugs.append(pos)
-                self.get_tile(pos).set_weapon(slug.get_weapon())
-        
-        for pos in dead_slugs:
-            del self._slugs[pos]
-
-        # Move remaining slugs
-        for slug_position, slug in self._slugs.items():
-            # Update slug movement abilities based on their status or effects
-            if slug.is_poisoned() or slug.is_stunned():  # Check for poison or stun
-                slug.set_can_move_flag(False)  # Disable movement for poisoned or stunned slugs
-            else:
-                slug.set_can_move_flag(True)
-
-            # Perform slug attacks if they can move
-            if slug._can_move_flag:
-                self.perform_attack(slug, slug_position)
-
-            slug.end_turn()
+        # Apply poison, remove dead slugs and let slugs near the player attack
+        dead_slugs, attacks = self._slug_scheduler.run_turn(self._player_position)
+        for pos, slug in dead_slugs:
+            self.get_tile(pos).set_weapon(slug.get_weapon())
+        for _, effects in attacks:
+            self._player.apply_effects(effects)
 
         # Update player's previous position
         self._previous_player_position = self._player_position
 
     def handle_player_move(self, position_delta: Position) -> None:
         """Handles the player's movement and associated actions."""
-        new_position = (self._player_position[0] + position_delta[0],
-                        self._player_position[1] + position_delta[1])
-        
-        # Check if the move is valid
-        if (0 <= new_position[0] < len(self._tiles) and
-            0 <= new_position[1] < len(self._tiles[0]) and
-            not self.get_tile(new_position).is_blocking_tile() and
-            new_position not in self._slugs):
-            
-            # Update player position
-            self._player_position = new_position
-
-            # Check for weapon pickup
-            tile = self.get_tile(new_position)
-            if tile.get_weapon():
-                self._player.equip(tile.get_weapon())
-                tile.remove_weapon()
-
-            # Player attacks
-            self.perform_attack(self._player, self._player_position)
+        self._try_player_move(position_delta)
+
+    def handle_player_moves(self, position_deltas: list[Position]) -> list[tuple[Position, int, int, int]]:
+        """Handles a sequence of player moves in one call, stopping early.
+
+        Each delta is applied exactly as handle_player_move would apply it. The
+        batch stops before the first illegal move, or as soon as the game has
+        been won or lost, so the final state matches calling handle_player_move
+        in a loop over the moves that were actually taken.
+
+        Returns a summary of each turn taken as
+        (player_position, player_health, player_poison, #slugs).
+        """
+        if self.has_won() or self.has_lost():
+            return []
+
+        # Look up everything the loop needs once, not on every move
+        player = self._player
+        get_move_target = self._get_move_target
+        play_turn = self._play_turn
+        count_slugs = self._count_slugs
+        get_health, get_poison, is_alive = player.get_health, player.get_poison, player.is_alive
+        tiles = self._tiles
+
+        summary = []
+        add_turn = summary.append
+        for position_delta in position_deltas:
+            new_position = get_move_target(position_delta)
+            if new_position is None:
+                break
+            play_turn(new_position)
+            slug_count = count_slugs()
+            add_turn((new_position, get_health(), get_poison(), slug_count))
+
+            # Only look at the tile once every slug is gone
+            if not is_alive() or (not slug_count and
+                                  str(tiles[new_position[0]][new_position[1]]) == GOAL_TILE):
+                break
+        return summary
+
+    def _try_player_move(self, position_delta: Position) -> bool:
+        """Moves the player and plays out the turn if the move is legal.
+
+        Returns True if the move was made, or False if it was illegal and
+        nothing changed.
+        """
+        new_position = self._get_move_target(position_delta)
+        if new_position is None:
+            return False
+        self._play_turn(new_position)
+        return True
+
+    def _get_move_target(self, position_delta: Position) -> Optional[Position]:
+        """Returns the player's position after the given move, or None if the move is illegal."""
+        x, y = self._player_position
+        dx, dy = position_delta
+        new_position = (x + dx, y + dy)
+
+        # Check if the move is valid. Single steps only need the wall mask of
+        # the current cell; other moves check bounds and the tile itself.
+        bit = _MOVE_BITS.get(position_delta)
+        if bit is not None:
+            masks = self._neighbour_masks
+            if masks is None:
+                masks = self._get_neighbour_masks()
+            walkable = masks[x * self._columns + y] >> bit & 1
+        else:
+            walkable = (0 <= new_position[0] < len(self._tiles) and
+                        0 <= new_position[1] < self._columns and
+                        not self.get_tile(new_position).is_blocking_tile())
+        if not walkable or self._is_occupied(new_position):
+            return None
+        return new_position
+
+    def _play_turn(self, new_position: Position) -> None:
+        """Moves the player to the given position and plays out the turn."""
+        # Update player position
+        self._player_position = new_position
+
+        # Check for weapon pickup
+        tile = self.get_tile(new_position)
+        if tile.get_weapon():
+            self._player.equip(tile.get_weapon())
+            tile.remove_weapon()
+
+        # Player attacks
+        self.perform_attack(self._player, self._player_position)
+
+        # End the turn
+        self.end_turn()
 
-            # End the turn
-            self.end_turn()
-            
     def has_lost(self) -> bool:
         """Returns True if the player has lost the game."""
         return not self._player.is_alive()
@@ -519,7 +776,15 @@ class SlugDungeonModel():
     def has_won(self) -> bool:
         """Returns True if the player has won the game."""
         goal_reached = self.get_tile(self._player_position).__str__() == "G"
-        return goal_reached and len(self._slugs) == 0
+        return goal_reached and self._count_slugs() == 0
+
+    def _is_occupied(self, position: Position) -> bool:
+        """Returns True if a slug is at the given position."""
+        return position in self._slugs
+
+    def _count_slugs(self) -> int:
+        """Returns the number of slugs still in the game."""
+        return len(self._slugs)
     
 def load_level(filename: str) -> SlugDungeonModel:
 
@@ -561,6 +826,673 @@ def load_level(filename: str) -> SlugDungeonModel:
     # Return an instance of SlugDungeonModel with the parsed data
     return SlugDungeonModel(tiles=tiles, slugs=slugs, player=player, player_position=player_position)
 
+# Observation channel layout used by VectorDungeonEnv
+TILE_CHANNELS = ("wall", "goal", "weapon", "player")
+SLUG_CHANNELS = ("type", "health", "poison")
+PLAYER_STATS = ("row", "column", "health", "poison", "weapon", "won", "lost")
+SLUG_CODES = {NICE_SLUG_SYMBOL: 1, ANGRY_SLUG_SYMBOL: 2, SCARED_SLUG_SYMBOL: 3}
+WEAPON_CODES = {POISON_DART_SYMBOL: 1, POISON_SWORD_SYMBOL: 2, HEALING_ROCK_SYMBOL: 3}
+_MISMATCHED_DIMENSIONS = "All games in a VectorDungeonEnv must have the same dimensions."
+
+
+class DungeonObservations():
+    """Preallocated observation buffers for a batch of dungeons of equal size.
+
+    All buffers live in a single block of memory, optionally backed by shared
+    memory so that other processes can attach by name. The shaped views
+    (tiles, slugs, players) can be read without copying, e.g. by passing them
+    to numpy.asarray. Drop those views before calling close.
+    """
+
+    def __init__(self, num_envs: int, dimensions: tuple[int, int], name: Optional[str] = None, create: bool = False) -> None:
+        """Allocates (or attaches to) the buffers for num_envs dungeons.
+
+        Parameters:
+            num_envs: Number of dungeons in the batch.
+            dimensions: (#rows, #columns) of every dungeon.
+            name: Name of a shared memory block to attach to, if any.
+            create: If True, create a new shared memory block instead.
+        """
+        rows, columns = dimensions
+        self._num_envs = num_envs
+        self._dimensions = dimensions
+        self._cells = rows * columns
+
+        tile_size = num_envs * len(TILE_CHANNELS) * self._cells
+        # Keep the int32 buffers 4-byte aligned
+        slug_offset = (tile_size + 3) // 4 * 4
+        player_offset = slug_offset + 4 * num_envs * len(SLUG_CHANNELS) * self._cells
+        total_size = player_offset + 4 * num_envs * len(PLAYER_STATS)
+
+        self._shared_memory = None
+        self._owner = False
+        self._closed = False
+        if create or name is not None:
+            self._shared_memory = shared_memory.SharedMemory(name=name, create=create, size=total_size)
+            self._owner = create
+            if not create:
+                # Only the creator may unlink the block, so stop this process's
+                # resource tracker from unlinking it when this process exits
+                resource_tracker.unregister(self._shared_memory._name, "shared_memory")
+            buffer = self._shared_memory.buf
+        else:
+            buffer = memoryview(bytearray(total_size))
+
+        # Flat views are used for writing, shaped views are exposed for reading
+        self._tiles = buffer[:tile_size].cast("b")
+        self._slugs = buffer[slug_offset:player_offset].cast("i")
+        self._players = buffer[player_offset:total_size].cast("i")
+
+    def get_name(self) -> Optional[str]:
+        """Returns the shared memory name, or None if not shared."""
+        return self._shared_memory.name if self._shared_memory else None
+
+    def get_dimensions(self) -> tuple[int, int]:
+        """Returns the dimensions of each dungeon as (#rows, #columns)."""
+        return self._dimensions
+
+    @property
+    def tiles(self) -> memoryview:
+        """Tile channels with shape (#envs, #tile channels, #rows, #columns)."""
+        return self._tiles.cast("B").cast("b", (self._num_envs, len(TILE_CHANNELS)) + self._dimensions)
+
+    @property
+    def slugs(self) -> memoryview:
+        """Slug channels with shape (#envs, #slug channels, #rows, #columns)."""
+        return self._slugs.cast("B").cast("i", (self._num_envs, len(SLUG_CHANNELS)) + self._dimensions)
+
+    @property
+    def players(self) -> memoryview:
+        """Player stats with shape (#envs, #player stats)."""
+        return self._players.cast("B").cast("i", (self._num_envs, len(PLAYER_STATS)))
+
+    def set_tile(self, index: int, position: Position, channel: str, value: int) -> None:
+        """Sets one of the TILE_CHANNELS of a cell in the dungeon at index."""
+        x, y = position
+        offset = (index * len(TILE_CHANNELS) + TILE_CHANNELS.index(channel)) * self._cells
+        self._tiles[offset + x * self._dimensions[1] + y] = value
+
+    def set_slug(self, index: int, position: Position, slug_type: int, health: int, poison: int) -> None:
+        """Sets the slug channels of a cell in the dungeon at index (all 0 for no slug)."""
+        x, y = position
+        cell = index * len(SLUG_CHANNELS) * self._cells + x * self._dimensions[1] + y
+        self._slugs[cell] = slug_type
+        self._slugs[cell + self._cells] = health
+        self._slugs[cell + 2 * self._cells] = poison
+
+    def clear_slugs(self, index: int) -> None:
+        """Clears the slug channels of every cell in the dungeon at index."""
+        size = len(SLUG_CHANNELS) * self._cells
+        self._slugs[index * size:(index + 1) * size] = memoryview(bytes(4 * size)).cast("i")
+
+    def set_player_stats(self, index: int, stats: tuple[int, ...]) -> None:
+        """Sets the PLAYER_STATS of the dungeon at index, in that order."""
+        if len(stats) != len(PLAYER_STATS):
+            raise ValueError(f"Expected {len(PLAYER_STATS)} player stats, got {len(stats)}.")
+        start = index * len(PLAYER_STATS)
+        for offset, value in enumerate(stats):
+            self._players[start + offset] = value
+
+    def close(self) -> None:
+        """Releases the buffers, unlinking the shared memory if it was created here.
+
+        Any views taken from tiles, slugs or players (including arrays that
+        wrap them) must be dropped first, otherwise BufferError is raised.
+        The shared memory is unlinked even then, and close can be called
+        again once the views are gone. Closing twice does nothing.
+        """
+        if self._closed:
+            return
+        for view in (self._tiles, self._slugs, self._players):
+            view.release()
+        if self._shared_memory:
+            try:
+                if self._owner:
+                    self._owner = False
+                    self._shared_memory.unlink()
+            finally:
+                self._shared_memory.close()
+        self._closed = True
+
+    def __enter__(self) -> 'DungeonObservations':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class VectorDungeonEnv():
+    """Steps several SlugDungeonModel instances in lockstep.
+
+    Observations are written in place into a DungeonObservations instance.
+    Only the cells that can change on a turn are rewritten, so the cost of a
+    step scales with the number of slugs rather than the size of the map.
+    """
+
+    def __init__(self, make_model: Callable[[], SlugDungeonModel], num_envs: int, shared: bool = False) -> None:
+        """Constructs num_envs games from make_model.
+
+        Parameters:
+            make_model: Returns a fresh game; called again when a game ends.
+            num_envs: Number of games to step together.
+            shared: If True, back the observations with shared memory.
+        """
+        self._make_model = make_model
+        self._models = [make_model() for _ in range(num_envs)]
+        dimensions = self._models[0].get_dimensions()
+        if any(model.get_dimensions() != dimensions for model in self._models):
+            raise ValueError(_MISMATCHED_DIMENSIONS)
+
+        self._observations = DungeonObservations(num_envs, dimensions, create=shared)
+        self._slug_positions = [[] for _ in range(num_envs)]
+        self._done = [False] * num_envs
+        for index in range(num_envs):
+            self._write_full(index)
+
+    def get_models(self) -> list[SlugDungeonModel]:
+        """Returns the games being stepped."""
+        return self._models
+
+    def get_observations(self) -> DungeonObservations:
+        """Returns the buffers observations are written into."""
+        return self._observations
+
+    def step(self, actions: list[int]) -> tuple[list[int], list[bool]]:
+        """Applies one move to every game and updates the observations.
+
+        Parameters:
+            actions: One index into POSITION_DELTAS per game.
+
+        Returns:
+            (rewards, dones) where a reward is 1 for a win, -1 for a loss and
+            0 otherwise. A game that was done is restarted instead of moved.
+
+        Raises:
+            ValueError: If there is not exactly one action per game, or a
+                restarted game has different dimensions.
+        """
+        if len(actions) != len(self._models):
+            raise ValueError(f"Expected {len(self._models)} actions, got {len(actions)}.")
+
+        rewards = []
+        for index, (model, action) in enumerate(zip(self._models, actions)):
+            if self._done[index]:
+                self._models[index] = self._restart_model()
+                self._done[index] = False
+                self._write_full(index)
+                rewards.append(0)
+                continue
+
+            old_position = model.get_player_position()
+            model.handle_player_move(POSITION_DELTAS[action])
+            self._write_turn(index, old_position)
+
+            if model.has_won():
+                rewards.append(1)
+                self._done[index] = True
+            elif model.has_lost():
+                rewards.append(-1)
+                self._done[index] = True
+            else:
+                rewards.append(0)
+
+        return rewards, list(self._done)
+
+    def close(self) -> None:
+        """Releases the observation buffers (see DungeonObservations.close)."""
+        self._observations.close()
+
+    def __enter__(self) -> 'VectorDungeonEnv':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _restart_model(self) -> SlugDungeonModel:
+        """Returns a fresh game from make_model, checking that it fits the observations."""
+        model = self._make_model()
+        if model.get_dimensions() != self._observations.get_dimensions():
+            raise ValueError(_MISMATCHED_DIMENSIONS)
+        return model
+
+    def _write_full(self, index: int) -> None:
+        """Writes every observation cell for the game at index."""
+        model = self._models[index]
+        observations = self._observations
+
+        for row_idx, row in enumerate(model.get_tiles()):
+            for col_idx, tile in enumerate(row):
+                position = (row_idx, col_idx)
+                observations.set_tile(index, position, "wall", tile.is_blocking_tile())
+                observations.set_tile(index, position, "goal", str(tile) == GOAL_TILE)
+                observations.set_tile(index, position, "weapon", _weapon_code(tile.get_weapon()))
+                observations.set_tile(index, position, "player", 0)
+
+        observations.clear_slugs(index)
+        self._slug_positions[index] = []
+        self._write_turn(index, model.get_player_position())
+
+    def _write_turn(self, index: int, old_position: Position) -> None:
+        """Rewrites the cells of the game at index that a turn can change."""
+        model = self._models[index]
+        observations = self._observations
+        player = model.get_player()
+        position = model.get_player_position()
+
+        # Weapons can only be picked up by the player or dropped by dead slugs
+        current_slugs = model.get_slugs()
+        changed = [position]
+        for slug_position in self._slug_positions[index]:
+            observations.set_slug(index, slug_position, 0, 0, 0)
+            if slug_position not in current_slugs:
+                changed.append(slug_position)
+        for changed_position in changed:
+            observations.set_tile(index, changed_position, "weapon",
+                                  _weapon_code(model.get_tile(changed_position).get_weapon()))
+
+        for slug_position, slug in current_slugs.items():
+            observations.set_slug(index, slug_position, SLUG_CODES.get(slug.get_symbol(), 0),
+                                  slug.get_health(), slug.get_poison())
+        self._slug_positions[index] = list(current_slugs)
+
+        observations.set_tile(index, old_position, "player", 0)
+        observations.set_tile(index, position, "player", 1)
+
+        observations.set_player_stats(index, (position[0], position[1], player.get_health(), player.get_poison(),
+                                              _weapon_code(player.get_weapon()), model.has_won(), model.has_lost()))
+
+
+def _weapon_code(weapon: Optional[Weapon]) -> int:
+    """Returns the WEAPON_CODES entry for a weapon, or 0 for no weapon."""
+    return WEAPON_CODES.get(weapon.get_symbol(), 0) if weapon else 0
+
+
+class _SlugShard():
+    """The slugs of one band of rows, simulated inside a worker process."""
+
+    def __init__(self, slugs: dict[Position, tuple[int, Slug]]) -> None:
+        """Constructs a shard from slug positions mapped to (order, slug)."""
+        self._scheduler = _SlugScheduler({pos: slug for pos, (_, slug) in slugs.items()})
+        self._slugs = self._scheduler.get_slugs()
+        self._order = {pos: order for pos, (order, _) in slugs.items()}
+
+    def run_turn(self, hits: list[tuple[Position, dict[str, int]]], player_position: Position) -> tuple[list, list]:
+        """Applies the player's hits, then runs the slug phases of a turn.
+
+        Parameters:
+            hits: Effects of the player's attack on slugs in this shard.
+            player_position: Where the player is this turn.
+
+        Returns:
+            (deaths, attacks) where deaths lists (position, weapon) for each
+            slug that died and attacks lists (order, effect) for each slug
+            that attacked the player.
+        """
+        for pos, effects in hits:
+            self._slugs[pos].apply_effects(effects)
+
+        dead_slugs, attacks = self._scheduler.run_turn(player_position)
+        return ([(pos, slug.get_weapon()) for pos, slug in dead_slugs],
+                [(self._order[pos], effects) for pos, effects in attacks])
+
+    def get_slugs(self) -> list[tuple[int, Position, Slug]]:
+        """Returns (order, position, slug) for every slug in this shard."""
+        return [(self._order[pos], pos, slug) for pos, slug in self._slugs.items()]
+
+
+def _run_shard(connection, slugs: dict[Position, tuple[int, Slug]]) -> None:
+    """Worker process loop serving turn and collection requests for one shard."""
+    shard = _SlugShard(slugs)
+    while True:
+        request, *args = connection.recv()
+        if request == "turn":
+            connection.send(shard.run_turn(*args))
+        elif request == "slugs":
+            connection.send(shard.get_slugs())
+        else:
+            break
+    connection.close()
+
+
+class _ShardedModel(SlugDungeonModel):
+    """The main-process side of a ShardedDungeonEngine.
+
+    Movement goes through SlugDungeonModel as usual, but the slugs themselves
+    live in the workers. _slug_shards maps each slug position to the index
+    of the worker owning it; the player's hits and the end of the turn are
+    forwarded to the workers.
+    """
+
+    def __init__(self, tiles: list[list[Tile]], slug_shards: dict[Position, int], player: Player,
+                 player_position: Position, connections: list) -> None:
+        super().__init__(tiles, {}, player, player_position)
+        self._slug_shards = slug_shards
+        self._connections = connections
+        self._hits = [[] for _ in connections]
+
+    def get_slugs(self) -> dict[Position, Slug]:
+        """Not available: the slugs are held by the workers."""
+        raise NotImplementedError("Slugs live in the workers; use ShardedDungeonEngine.sync().")
+
+    def get_valid_slug_positions(self, slug: Slug) -> list[Position]:
+        """Not available: the slugs are held by the workers."""
+        raise NotImplementedError("Slugs live in the workers; use ShardedDungeonEngine.sync().")
+
+    def perform_attack(self, entity: Entity, position: Position) -> None:
+        """Queues the player's hits for the workers owning the targets."""
+        if not entity.get_weapon():
+            return
+
+        for target in entity.get_weapon_targets(position):
+            shard = self._slug_shards.get(target)
+            if shard is not None:
+                self._hits[shard].append((target, entity.get_weapon_effect()))
+
+    def end_turn(self) -> None:
+        """Runs end_turn with the slug phases spread across the workers."""
+        self._player.apply_poison()
+
+        # Every worker works on the turn at the same time
+        for connection, hits in zip(self._connections, self._hits):
+            connection.send(("turn", hits, self._player_position))
+        results = [connection.recv() for connection in self._connections]
+        self._hits = [[] for _ in self._connections]
+
+        attacks = []
+        for deaths, shard_attacks in results:
+            for pos, weapon in deaths:
+                self.get_tile(pos).set_weapon(weapon)
+                del self._slug_shards[pos]
+            attacks.extend(shard_attacks)
+
+        # Slugs attack in the same order as in the single-process model
+        for _, effects in sorted(attacks, key=lambda attack: attack[0]):
+            self._player.apply_effects(effects)
+
+        self._previous_player_position = self._player_position
+
+    def _is_occupied(self, position: Position) -> bool:
+        """Returns True if a slug is at the given position."""
+        return position in self._slug_shards
+
+    def _count_slugs(self) -> int:
+        """Returns the number of slugs still in the game."""
+        return len(self._slug_shards)
+
+
+class ShardedDungeonEngine():
+    """Plays a SlugDungeonModel with its slugs split across worker processes.
+
+    The map is cut into bands of rows, one per worker. Each worker runs the
+    poison, death and attack phases of end_turn for the slugs in its band,
+    using the same code as SlugDungeonModel. The main process owns the
+    player and the tiles. It sends the player's hits to whichever worker
+    owns each target, so attacks across band borders need no extra
+    exchange. Attacks on the player are applied in the model's original
+    slug order, which keeps the result identical to SlugDungeonModel. Slugs
+    never change position in end_turn, so no two workers can race for the
+    same cell.
+
+    The engine takes ownership of the model it is given, which must not be
+    used afterwards. sync() stops the engine and returns an up-to-date
+    SlugDungeonModel; after sync() or close() the engine cannot be played.
+    """
+
+    def __init__(self, model: SlugDungeonModel, num_shards: int) -> None:
+        """Starts num_shards workers for the slugs of the given game.
+
+        Parameters:
+            model: The game to play; the engine takes ownership of it.
+            num_shards: Number of worker processes.
+        """
+        band_height = -(-model.get_dimensions()[0] // num_shards)
+
+        shard_slugs = [{} for _ in range(num_shards)]
+        slug_shards = {}
+        for order, (pos, slug) in enumerate(model.get_slugs().items()):
+            slug_shards[pos] = pos[0] // band_height
+            shard_slugs[slug_shards[pos]][pos] = (order, slug)
+
+        self._connections = []
+        self._workers = []
+        for slugs in shard_slugs:
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_run_shard, args=(worker_connection, slugs), daemon=True)
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+        self._model = _ShardedModel(model.get_tiles(), slug_shards, model.get_player(),
+                                    model.get_player_position(), self._connections)
+        self._closed = False
+
+    def handle_player_move(self, position_delta: Position) -> None:
+        """Handles the player's movement exactly as SlugDungeonModel does."""
+        self._check_open()
+        self._model.handle_player_move(position_delta)
+
+    def handle_player_moves(self, position_deltas: list[Position]) -> list[tuple[Position, int, int, int]]:
+        """Handles a sequence of moves exactly as SlugDungeonModel does."""
+        self._check_open()
+        return self._model.handle_player_moves(position_deltas)
+
+    def get_player(self) -> Player:
+        """Returns the player instance."""
+        return self._model.get_player()
+
+    def get_player_position(self) -> Position:
+        """Returns the player's current position."""
+        return self._model.get_player_position()
+
+    def has_lost(self) -> bool:
+        """Returns True if the player has lost the game."""
+        return self._model.has_lost()
+
+    def has_won(self) -> bool:
+        """Returns True if the player has won the game."""
+        return self._model.has_won()
+
+    def sync(self) -> SlugDungeonModel:
+        """Stops the engine and returns the game in its current state."""
+        self._check_open()
+        for connection in self._connections:
+            connection.send(("slugs",))
+        slugs = sorted(slug for connection in self._connections for slug in connection.recv())
+        self.close()
+
+        model = self._model
+        return SlugDungeonModel(model.get_tiles(), {pos: slug for _, pos, slug in slugs},
+                                model.get_player(), model.get_player_position())
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stops the worker processes. Closing twice does nothing.
+
+        Workers that have already died are skipped, and workers that have
+        not exited within timeout seconds are terminated.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for connection in self._connections:
+            try:
+                connection.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass  # The worker has already gone
+            finally:
+                connection.close()
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    def __enter__(self) -> 'ShardedDungeonEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _check_open(self) -> None:
+        """Raises RuntimeError if the engine has been stopped."""
+        if self._closed:
+            raise RuntimeError("ShardedDungeonEngine has been closed or synced.")
+
+
+def benchmark_sharded(make_model: Callable[[], SlugDungeonModel], moves: list[Position], shard_counts: list[int]) -> dict[int, float]:
+    """Returns the speedup of ShardedDungeonEngine over SlugDungeonModel.
+
+    Parameters:
+        make_model: Returns a fresh copy of the game to play.
+        moves: Player moves to play through.
+        shard_counts: Numbers of worker processes to try.
+
+    Returns:
+        Mapping from worker count to (single-process time / sharded time).
+    """
+    model = make_model()
+    start = time.perf_counter()
+    for move in moves:
+        model.handle_player_move(move)
+    single_time = time.perf_counter() - start
+
+    speedups = {}
+    for num_shards in shard_counts:
+        with ShardedDungeonEngine(make_model(), num_shards) as engine:
+            start = time.perf_counter()
+            for move in moves:
+                engine.handle_player_move(move)
+            speedups[num_shards] = single_time / (time.perf_counter() - start)
+    return speedups
+
+
+SIDEBAR_WIDTH = 28
+
+
+class TerminalRenderer():
+    """Draws a SlugDungeonModel on an ANSI terminal.
+
+    The first frame is drawn in full. Later frames only emit cursor-addressed
+    writes for the characters that changed, so each frame stays small even on
+    large maps. The map is shown through a viewport that follows the player,
+    with a stats sidebar to its right.
+    """
+
+    def __init__(self, model: SlugDungeonModel, viewport: tuple[int, int] = (20, 40), output=None) -> None:
+        """Constructs a renderer for the given game.
+
+        Parameters:
+            model: The game to draw.
+            viewport: Size of the visible map area as (#rows, #columns).
+            output: Stream to write frames to (defaults to sys.stdout).
+        """
+        self._model = model
+        self._viewport = viewport
+        self._output = output if output is not None else sys.stdout
+        self._previous_frame = None
+
+    def set_model(self, model: SlugDungeonModel) -> None:
+        """Switches to a new game; the next frame is drawn in full."""
+        self._model = model
+        self._previous_frame = None
+
+    def get_viewport_origin(self) -> Position:
+        """Returns the map position shown in the top left of the viewport."""
+        rows, columns = self._model.get_dimensions()
+        view_rows, view_columns = self._viewport
+        x, y = self._model.get_player_position()
+        # Centre on the player without scrolling past the edges of the map
+        top = max(0, min(x - view_rows // 2, rows - view_rows))
+        left = max(0, min(y - view_columns // 2, columns - view_columns))
+        return top, left
+
+    def build_frame(self) -> list[str]:
+        """Returns the lines of the current frame, all of equal width."""
+        model = self._model
+        rows, columns = model.get_dimensions()
+        view_rows, view_columns = self._viewport
+        top, left = self.get_viewport_origin()
+        tiles = model.get_tiles()
+        slugs = model.get_slugs()
+        player_position = model.get_player_position()
+
+        map_lines = []
+        for x in range(top, top + view_rows):
+            line = []
+            for y in range(left, left + view_columns):
+                if x >= rows or y >= columns:
+                    line.append(" ")
+                elif (x, y) == player_position:
+                    line.append(PLAYER_SYMBOL)
+                elif (x, y) in slugs:
+                    line.append(slugs[(x, y)].get_symbol())
+                elif tiles[x][y].get_weapon():
+                    line.append(tiles[x][y].get_weapon().get_symbol())
+                else:
+                    line.append(str(tiles[x][y]))
+            map_lines.append("".join(line))
+
+        sidebar = self._build_sidebar()
+        height = max(view_rows, len(sidebar))
+        frame = []
+        for index in range(height):
+            map_line = map_lines[index] if index < view_rows else " " * view_columns
+            side_line = sidebar[index] if index < len(sidebar) else ""
+            frame.append(f"{map_line} {side_line[:SIDEBAR_WIDTH]:<{SIDEBAR_WIDTH}}")
+        return frame
+
+    def render(self) -> str:
+        """Writes the current frame to the output and returns what was written."""
+        frame = self.build_frame()
+        previous = self._previous_frame
+
+        if previous is None or len(previous) != len(frame):
+            # Clear the screen and draw everything
+            parts = ["\x1b[2J\x1b[H", "\r\n".join(frame)]
+        else:
+            parts = []
+            for row_idx, (old_line, new_line) in enumerate(zip(previous, frame)):
+                if old_line == new_line:
+                    continue
+                col_idx = 0
+                while col_idx < len(new_line):
+                    if old_line[col_idx] == new_line[col_idx]:
+                        col_idx += 1
+                        continue
+                    # Group a run of changed characters under one cursor move
+                    end = col_idx + 1
+                    while end < len(new_line) and old_line[end] != new_line[end]:
+                        end += 1
+                    parts.append(f"\x1b[{row_idx + 1};{col_idx + 1}H{new_line[col_idx:end]}")
+                    col_idx = end
+
+        if parts:
+            # Leave the cursor below the frame
+            parts.append(f"\x1b[{len(frame) + 1};1H")
+        output = "".join(parts)
+        self._previous_frame = frame
+        self._output.write(output)
+        self._output.flush()
+        return output
+
+    def _build_sidebar(self) -> list[str]:
+        """Returns the lines of the stats sidebar."""
+        model = self._model
+        player = model.get_player()
+        weapon = player.get_weapon()
+        lines = [
+            f"Health: {player.get_health()}",
+            f"Poison: {player.get_poison()}",
+            f"Weapon: {weapon.get_name() if weapon else 'None'}",
+            f"Position: {model.get_player_position()}",
+            f"Slugs: {len(model.get_slugs())}",
+            "",
+        ]
+        for position, slug in itertools.islice(model.get_slugs().items(), MAX_SLUGS):
+            lines.append(f"{slug.get_symbol()} {position} H{slug.get_health()} P{slug.get_poison()}")
+        return lines
+
+
 class DungeonMap(AbstractGrid):
     def __init__(self, master, dimensions, size):
         super().__init__(master, dimensions, size)
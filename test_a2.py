@@ -0,0 +1,430 @@
+import io
+import multiprocessing
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from a2 import *
+
+SLUG_TYPES = {NICE_SLUG_SYMBOL: NiceSlug, ANGRY_SLUG_SYMBOL: AngrySlug, SCARED_SLUG_SYMBOL: ScaredSlug}
+
+
+def build_model(lines: list[str], model_class: type = SlugDungeonModel) -> SlugDungeonModel:
+    """Builds a game from level lines (max health first, then the map)."""
+    tiles = []
+    slugs = {}
+    player_position = None
+    for row_idx, line in enumerate(lines[1:]):
+        row = []
+        for col_idx, char in enumerate(line):
+            row.append(create_tile(char))
+            if char == PLAYER_SYMBOL:
+                player_position = (row_idx, col_idx)
+            elif char in SLUG_TYPES:
+                slugs[(row_idx, col_idx)] = SLUG_TYPES[char]()
+        tiles.append(row)
+    return model_class(tiles, slugs, Player(int(lines[0])), player_position)
+
+
+class ReferenceModel(SlugDungeonModel):
+    """Runs end_turn as separate poison and movement passes over every slug."""
+
+    def end_turn(self) -> None:
+        self._player.apply_poison()
+
+        dead_slugs = []
+        for pos, slug in self._slugs.items():
+            slug.apply_poison()
+            if not slug.is_alive():
+                dead_slugs.append(pos)
+                self.get_tile(pos).set_weapon(slug.get_weapon())
+        for pos in dead_slugs:
+            del self._slugs[pos]
+
+        for slug_position, slug in self._slugs.items():
+            slug.set_can_move_flag(not (slug.is_poisoned() or slug.is_stunned()))
+            if slug.can_move():
+                self.perform_attack(slug, slug_position)
+            slug.end_turn()
+
+        self._previous_player_position = self._player_position
+
+
+def random_lines(rows: int, columns: int, seed: int, slug_density: float = 0.3) -> list[str]:
+    """Returns the lines of a random walled level."""
+    rng = random.Random(seed)
+    lines = ["30"]
+    for x in range(rows):
+        line = ""
+        for y in range(columns):
+            roll = rng.random()
+            if x in (0, rows - 1) or y in (0, columns - 1):
+                line += WALL_TILE
+            elif (x, y) == (1, 1):
+                line += PLAYER_SYMBOL
+            elif (x, y) == (rows - 2, columns - 2):
+                line += GOAL_TILE
+            elif roll < 0.1:
+                line += WALL_TILE
+            elif roll < 0.1 + slug_density:
+                line += rng.choice([NICE_SLUG_SYMBOL, ANGRY_SLUG_SYMBOL, SCARED_SLUG_SYMBOL])
+            elif roll < 0.6:
+                line += rng.choice([FLOOR_TILE, POISON_DART_SYMBOL, POISON_SWORD_SYMBOL, HEALING_ROCK_SYMBOL])
+            else:
+                line += FLOOR_TILE
+        lines.append(line)
+    return lines
+
+
+def game_state(model: SlugDungeonModel) -> tuple:
+    """Returns a comparable snapshot of everything a turn can change."""
+    player = model.get_player()
+    return (
+        model.get_player_position(),
+        player.get_health(),
+        player.get_poison(),
+        repr(player.get_weapon()),
+        sorted((pos, repr(slug), slug.get_health(), slug.get_poison(), slug.can_move())
+               for pos, slug in model.get_slugs().items()),
+        [[repr(tile.get_weapon()) for tile in row] for row in model.get_tiles()],
+    )
+
+
+def test_valid_slug_positions_match_tile_checks():
+    """The neighbour masks give the same moves as checking each tile."""
+    for seed in range(20):
+        model = build_model(random_lines(12, 15, seed))
+        rows, columns = model.get_dimensions()
+        for (x, y), slug in model.get_slugs().items():
+            expected = [(i, j) for i, j in [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
+                        if 0 <= i < rows and 0 <= j < columns
+                        and not model.get_tile((i, j)).is_blocking_tile()
+                        and (i, j) not in model.get_slugs()
+                        and (i, j) != model.get_player_position()]
+            assert model.get_valid_slug_positions(slug) == (expected or [(x, y)])
+
+
+def test_handle_player_moves_matches_single_moves():
+    """A batch ends in the same state as the same moves made one at a time."""
+    for seed in range(50):
+        rng = random.Random(seed)
+        moves = [rng.choice(POSITION_DELTAS) for _ in range(100)]
+        batched = build_model(random_lines(15, 15, seed, 0.05))
+        single = build_model(random_lines(15, 15, seed, 0.05))
+
+        summary = batched.handle_player_moves(moves)
+        for move in moves[:len(summary)]:
+            single.handle_player_move(move)
+
+        assert game_state(batched) == game_state(single)
+
+
+def test_handle_player_moves_stops_at_illegal_move():
+    """The batch stops before a move into a wall."""
+    model = build_model(["20", "#####", "#P  #", "#####"])
+    summary = model.handle_player_moves([(0, 1), (-1, 0), (0, 1)])
+    assert summary == [((1, 2), 20, 0, 0)]
+    assert model.get_player_position() == (1, 2)
+
+
+def test_handle_player_moves_stops_when_game_ends():
+    """The batch stops on the goal once the slugs are gone, and does nothing after."""
+    model = build_model(["20", "#####", "#PG #", "#####"])
+    assert model.handle_player_moves([(0, 1), (0, 1)]) == [((1, 2), 20, 0, 0)]
+    assert model.has_won()
+    assert model.handle_player_moves([(0, 1)]) == []
+
+    model = build_model(["20", "######", "#PG A#", "######"])
+    assert len(model.handle_player_moves([(0, 1), (0, 1)])) == 2
+    assert not model.has_won()
+
+
+def test_vector_env_observations_match_full_rewrite():
+    """Incremental observation updates match rewriting every cell."""
+    make_model = lambda: build_model(random_lines(10, 10, 3, 0.1))
+    with VectorDungeonEnv(make_model, 4) as env, VectorDungeonEnv(make_model, 4) as reference:
+        rng = random.Random(0)
+        for _ in range(100):
+            actions = [rng.randrange(len(POSITION_DELTAS)) for _ in range(4)]
+            assert env.step(actions) == reference.step(actions)
+            for index in range(4):
+                reference._write_full(index)
+            observations, expected = env.get_observations(), reference.get_observations()
+            assert observations.tiles.tolist() == expected.tiles.tolist()
+            assert observations.slugs.tolist() == expected.slugs.tolist()
+            assert observations.players.tolist() == expected.players.tolist()
+
+
+def test_shared_observations_unlink_even_with_views_held():
+    """close unlinks shared memory even if a reader still holds a view."""
+    env = VectorDungeonEnv(lambda: build_model(random_lines(6, 6, 0)), 2, shared=True)
+    name = env.get_observations().get_name()
+    tiles = env.get_observations().tiles
+
+    with pytest.raises(BufferError):
+        env.close()
+    with pytest.raises(FileNotFoundError):
+        DungeonObservations(2, (6, 6), name=name)
+
+    tiles.release()
+    env.close()
+    env.close()
+
+
+def test_shared_observations_outlive_attached_processes():
+    """A separate process that attaches and exits leaves the block to its creator."""
+    reader = ("import sys; from a2 import DungeonObservations\n"
+              "with DungeonObservations(2, (6, 6), name=sys.argv[1]) as observations:\n"
+              "    print(observations.players.tolist())\n")
+    with VectorDungeonEnv(lambda: build_model(random_lines(6, 6, 0)), 2, shared=True) as env:
+        name = env.get_observations().get_name()
+        result = subprocess.run([sys.executable, "-c", reader, name], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        assert result.stdout.strip() == str(env.get_observations().players.tolist())
+
+        # The reader's resource tracker shuts down after the reader exits
+        for _ in range(20):
+            DungeonObservations(2, (6, 6), name=name).close()
+            time.sleep(0.05)
+
+
+def test_vector_env_checks_actions_and_restarted_games():
+    """step needs one action per game, and restarted games must keep the same size."""
+    sizes = iter([6, 6, 8])
+    env = VectorDungeonEnv(lambda: build_model(random_lines(next(sizes), 6, 0)), 2)
+    with pytest.raises(ValueError):
+        env.step([0])
+    env._done[0] = True
+    with pytest.raises(ValueError):
+        env.step([0, 0])
+    env.close()
+
+
+def test_observation_writes_land_in_the_shaped_views():
+    """The write methods fill the cells that the shaped views read back."""
+    with DungeonObservations(2, (3, 4)) as observations:
+        observations.set_tile(1, (2, 3), "weapon", 2)
+        observations.set_slug(1, (0, 1), 3, 5, 1)
+        observations.set_player_stats(0, (1, 2, 3, 4, 5, 0, 1))
+
+        tiles, slugs, players = observations.tiles, observations.slugs, observations.players
+        assert tiles[1, TILE_CHANNELS.index("weapon"), 2, 3] == 2
+        assert [slugs[1, channel, 0, 1] for channel in range(len(SLUG_CHANNELS))] == [3, 5, 1]
+        assert players.tolist()[0] == [1, 2, 3, 4, 5, 0, 1]
+        with pytest.raises(ValueError):
+            observations.set_player_stats(1, (1, 2))
+
+        observations.clear_slugs(1)
+        assert not any(slugs.tolist()[1][channel][0][1] for channel in range(len(SLUG_CHANNELS)))
+        for view in (tiles, slugs, players):
+            view.release()
+
+
+def test_end_turn_matches_separate_passes():
+    """Poison, deaths, attacks and move flags match running each phase over every slug."""
+    for seed in range(100):
+        rng = random.Random(seed)
+        model = build_model(random_lines(12, 12, seed))
+        reference = build_model(random_lines(12, 12, seed), ReferenceModel)
+        for turn in range(100):
+            # Also poison, hurt or heal slugs directly, outside the player's attacks
+            if rng.random() < 0.1 and model.get_slugs():
+                position = rng.choice(sorted(model.get_slugs()))
+                effects = rng.choice([{"poison": 2}, {"damage": 3}, {"healing": 1}])
+                model.get_slugs()[position].apply_effects(effects)
+                reference.get_slugs()[position].apply_effects(effects)
+
+            move = rng.choice(POSITION_DELTAS)
+            model.handle_player_move(move)
+            reference.handle_player_move(move)
+            # Skipped slugs work out their move flag lazily, so compare only sometimes
+            if turn % 7 == 0:
+                assert game_state(model) == game_state(reference)
+        assert game_state(model) == game_state(reference)
+
+
+def test_end_turn_poisons_slugs_poisoned_outside_attacks():
+    """Slugs poisoned directly, or added while poisoned, still take poison."""
+    model = build_model(["20", "#######", "#P   A#", "#######"])
+    model.get_slugs()[(1, 5)].apply_effects({"poison": 3})
+    added = AngrySlug()
+    added.apply_effects({"poison": 3})
+    model.get_slugs()[(1, 4)] = added
+
+    model.end_turn()
+
+    for slug in model.get_slugs().values():
+        assert (slug.get_health(), slug.get_poison()) == (2, 2)
+        assert slug.can_move()  # poisoned slugs skip their attack, then toggle back
+    assert model.get_player().get_health() == 20
+
+
+def test_skipped_slugs_work_out_their_move_flag():
+    """Slugs the scheduler never visits still report the flag a turn leaves."""
+    model = build_model(["20", "#########", "#P     N#", "#########"])
+    slug = model.get_slugs()[(1, 7)]
+    assert slug.can_move()
+    model.end_turn()
+    model.end_turn()
+    assert not slug.can_move()
+
+    added = AngrySlug()
+    model.get_slugs()[(1, 5)] = added
+    assert added.can_move()
+    model.end_turn()
+    assert not added.can_move()
+
+
+def test_slug_attacks_apply_in_slug_order():
+    """Healing and damage on the player are applied in dictionary order."""
+    lines = ["20", "#######", "#  N  #", "# AP  #", "#     #", "#######"]
+    model = build_model(lines)
+    reference = build_model(lines, ReferenceModel)
+    model.get_player().apply_effects({"damage": 19})
+    reference.get_player().apply_effects({"damage": 19})
+    model.end_turn()
+    reference.end_turn()
+    assert model.get_player().get_health() == reference.get_player().get_health()
+
+
+def test_sharded_engine_matches_single_process():
+    """The sharded engine plays out exactly like SlugDungeonModel."""
+    for seed in range(10):
+        rng = random.Random(seed)
+        moves = [rng.choice(POSITION_DELTAS) for _ in range(60)]
+        model = build_model(random_lines(16, 12, seed))
+        engine = ShardedDungeonEngine(build_model(random_lines(16, 12, seed)), 1 + seed % 4)
+        for move in moves:
+            model.handle_player_move(move)
+            engine.handle_player_move(move)
+            assert (engine.has_won(), engine.has_lost()) == (model.has_won(), model.has_lost())
+        assert game_state(engine.sync()) == game_state(model)
+
+
+def test_sharded_engine_cannot_be_played_after_sync():
+    """sync ends the engine; further moves raise instead of diverging."""
+    engine = ShardedDungeonEngine(build_model(random_lines(8, 8, 1)), 2)
+    engine.sync()
+    with pytest.raises(RuntimeError):
+        engine.handle_player_move((0, 1))
+    engine.close()
+
+
+def test_sharded_engine_closes_with_dead_or_stuck_workers():
+    """close copes with workers that have died, and terminates ones that hang."""
+    engine = ShardedDungeonEngine(build_model(random_lines(8, 8, 1)), 3)
+    engine._workers[0].kill()
+    engine._workers[0].join()
+    # Keep worker 1's pipe open but send its close request elsewhere, so it waits forever
+    stuck_connection = engine._connections[1]
+    engine._connections[1] = multiprocessing.Pipe()[0]
+    engine.close(timeout=0.5)
+    assert not any(worker.is_alive() for worker in engine._workers)
+    assert engine._workers[1].exitcode == -signal.SIGTERM
+    stuck_connection.close()
+
+    with ShardedDungeonEngine(build_model(random_lines(8, 8, 1)), 2) as engine:
+        engine.handle_player_move((0, 1))
+    assert not any(worker.is_alive() for worker in engine._workers)
+    with pytest.raises(RuntimeError):
+        engine.handle_player_move((0, 1))
+
+
+def test_player_moves_respect_walls_and_slugs():
+    """Single steps (via the wall masks) and longer jumps obey walls and slugs."""
+    model = build_model(["20", "######", "#P  A#", "# ## #", "######"])
+    model.handle_player_move((-1, 0))
+    model.handle_player_move((0, -1))
+    assert model.get_player_position() == (1, 1)
+    model.handle_player_move((0, 3))
+    assert model.get_player_position() == (1, 1)
+    model.handle_player_move((0, 2))
+    assert model.get_player_position() == (1, 3)
+    model.handle_player_move((1, 0))
+    assert model.get_player_position() == (1, 3)
+
+
+def test_sharded_engine_keeps_slugs_out_of_main_model():
+    """The main-process model does not pretend to hold the workers' slugs."""
+    moves = [random.Random(2).choice(POSITION_DELTAS) for _ in range(30)]
+    model = build_model(random_lines(10, 10, 2))
+    engine = ShardedDungeonEngine(build_model(random_lines(10, 10, 2)), 2)
+    try:
+        with pytest.raises(NotImplementedError):
+            engine._model.get_slugs()
+        assert engine.handle_player_moves(moves) == model.handle_player_moves(moves)
+    finally:
+        engine.close()
+
+
+def replay(frame: list[str], output: str) -> list[str]:
+    """Applies a renderer's cursor-addressed writes to a previous frame."""
+    lines = [list(line) for line in frame]
+    for row, column, text in re.findall(r"\x1b\[(\d+);(\d+)H([^\x1b]*)", output):
+        row, column = int(row) - 1, int(column) - 1
+        if text:
+            lines[row][column:column + len(text)] = text
+    return ["".join(line) for line in lines]
+
+
+def test_renderer_draws_first_frame_in_full():
+    """The first frame clears the screen and draws every line."""
+    model = build_model(random_lines(12, 12, 0))
+    renderer = TerminalRenderer(model, (6, 8), io.StringIO())
+    assert renderer.render() == "\x1b[2J\x1b[H" + "\r\n".join(renderer.build_frame()) + f"\x1b[{len(renderer.build_frame()) + 1};1H"
+
+
+def test_renderer_only_redraws_changed_cells():
+    """Later frames are only cursor-addressed runs that turn the last frame into the new one."""
+    for seed in range(10):
+        rng = random.Random(seed)
+        model = build_model(random_lines(20, 30, seed))
+        renderer = TerminalRenderer(model, (8, 12), io.StringIO())
+        renderer.render()
+        frame = renderer.build_frame()
+        for _ in range(30):
+            model.handle_player_move(rng.choice(POSITION_DELTAS))
+            output = renderer.render()
+            assert "\x1b[2J" not in output
+            assert re.fullmatch(r"(\x1b\[\d+;\d+H[^\x1b]*)*", output)
+            new_frame = renderer.build_frame()
+            assert replay(frame, output) == new_frame
+            assert len(output) <= sum(len(line) for line in new_frame)
+            frame = new_frame
+
+
+def test_renderer_skips_unchanged_frames():
+    """Redrawing an unchanged game writes nothing."""
+    renderer = TerminalRenderer(build_model(random_lines(10, 10, 1)), (5, 5), io.StringIO())
+    renderer.render()
+    assert renderer.render() == ""
+
+
+def test_renderer_viewport_stays_on_the_map():
+    """The viewport follows the player but never scrolls past the map edges."""
+    def open_level(player_position):
+        lines = ["20"] + ["#" * 30] + ["#" + " " * 28 + "#" for _ in range(18)] + ["#" * 30]
+        x, y = player_position
+        lines[x + 1] = lines[x + 1][:y] + PLAYER_SYMBOL + lines[x + 1][y + 1:]
+        return build_model(lines)
+
+    renderer = TerminalRenderer(open_level((1, 1)), (6, 10), io.StringIO())
+    assert renderer.get_viewport_origin() == (0, 0)
+    renderer.set_model(open_level((18, 28)))
+    assert renderer.get_viewport_origin() == (14, 20)
+    renderer.set_model(open_level((10, 15)))
+    assert renderer.get_viewport_origin() == (7, 10)
+
+    # A map smaller than the viewport is drawn from the corner and padded
+    small = build_model(["20", "####", "#P #", "####"])
+    renderer.set_model(small)
+    assert renderer.get_viewport_origin() == (0, 0)
+    frame = renderer.build_frame()
+    assert [line[:10] for line in frame[:6]] == ["####      ", "#P #      ", "####      "] + [" " * 10] * 3
+    assert len({len(line) for line in frame}) == 1